@@ -0,0 +1,52 @@
+"""
+Command-line options shared by the EdgeTest entry scripts.
+"""
+
+import argparse
+
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+def positive_int(value):
+    """argparse type for options that must be at least 1."""
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+# Options every entry script takes
+COMMON = (
+    (("--log-level",),
+     dict(type=str, default="INFO", choices=LOG_LEVELS,
+          help="Logging level (default: INFO)")),
+    (("--source", "-s"),
+     dict(type=str, default="test_video.mp4",
+          help="Input source (video file, image glob or camera index)")),
+)
+
+# Options of the instance ramp, taken by main.py and parallel_stress.py
+RAMP = (
+    (("--interval", "-i"),
+     dict(type=positive_int, default=10,
+          help="Sampling interval in seconds (default: 10s)")),
+    (("--max-instances", "-n"),
+     dict(type=int, default=16,
+          help="Maximum parallel instances to try (default: 16)")),
+    (("--cpu-threshold",),
+     dict(type=float, default=90.0,
+          help="Avg CPU%% threshold (default: 90.0)")),
+    (("--mem-threshold",),
+     dict(type=float, default=90.0,
+          help="Avg Memory%% threshold (default: 90.0)")),
+    (("--fps-threshold",),
+     dict(type=float, default=3.0,
+          help="FPS threshold for the slowest instances, compared "
+               "with the 5th percentile across instances (default: 3.0)")),
+)
+
+def build_parser(description, *groups):
+    """Create a parser with the COMMON options followed by `groups`."""
+    parser = argparse.ArgumentParser(description=description)
+    for group in (COMMON, *groups):
+        for flags, kwargs in group:
+            parser.add_argument(*flags, **kwargs)
+    return parser
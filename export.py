@@ -0,0 +1,112 @@
+"""
+export.py
+
+Hardware detection and cached model export shared by the entry scripts.
+"""
+
+import ctypes
+import sys
+import hashlib
+import json
+import shutil
+from functools import lru_cache
+from pathlib import Path
+import torch
+from ultralytics import YOLO
+
+def cuda_device_count():
+    """Count CUDA devices via the driver API, or None if libcuda is missing"""
+    try:
+        lib = ctypes.CDLL("nvcuda.dll" if sys.platform == "win32" else "libcuda.so.1")
+    except OSError:
+        return None
+    if lib.cuInit(0) != 0:
+        return 0
+    count = ctypes.c_int()
+    if lib.cuDeviceGetCount(ctypes.byref(count)) != 0:
+        return 0
+    return count.value
+
+@lru_cache(maxsize=1)
+def has_nvidia_gpu():
+    """Check for NVIDIA GPU support using PyTorch's CUDA API"""
+    # The driver probe answers in microseconds; only hosts that have a GPU
+    # go on to check that PyTorch itself was built with CUDA
+    if cuda_device_count() == 0:
+        return False
+    return torch.cuda.is_available()
+
+@lru_cache(maxsize=1)
+def is_intel_gpu():
+    """Check for Intel GPU support using PyTorch's XPU API"""
+    return torch.xpu.is_available() if hasattr(torch, 'xpu') else False
+
+def export_signature(pt_path: Path, kwargs: dict) -> str:
+    """Fingerprint a checkpoint together with the options it is exported with."""
+    h = hashlib.blake2b(digest_size=16)
+    with pt_path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return f"{h.hexdigest()} {json.dumps(kwargs, sort_keys=True)}"
+
+def export_model(pt_path: Path, fmt: str, device: str = None, logger=None,
+                 half: bool = True, int8: bool = False, workspace: int = 4,
+                 batch: int = 1):
+    """
+    Export a .pt checkpoint to the desired format via Ultraly­tics YOLO.export().
+      fmt: "engine" for TensorRT, or "openvino".
+      device: e.g. "0" for GPU, or None (uses CPU)
+      half / int8: build an FP16 / INT8 model instead of FP32
+      workspace: TensorRT builder workspace in GiB
+      batch: static batch size baked into the engine
+    The precision is part of the output name so FP32/FP16/INT8 exports of
+    the same checkpoint are cached side by side. An existing export is only
+    reused if its .sig sidecar matches the checkpoint and export options.
+    Returns the Path to the exported model.
+    """
+    precision = "int8" if int8 else "fp16" if half else "fp32"
+    if fmt == "openvino":
+        out = pt_path.with_name(f"{pt_path.stem}_{precision}_openvino_model")
+    else:
+        out = pt_path.with_name(f"{pt_path.stem}.{precision}.{fmt}")
+    sig_file = out.with_name(out.name + ".sig")
+
+    kwargs = {"format": fmt, "half": half, "int8": int8, "batch": batch}
+    if fmt == "engine":
+        kwargs["workspace"] = workspace
+    if device is not None:
+        kwargs["device"] = device
+
+    # A missing checkpoint is downloaded by YOLO() below, so it can't match
+    signature = export_signature(pt_path, kwargs) if pt_path.exists() else None
+    if out.exists():
+        if (signature is not None and sig_file.exists()
+                and sig_file.read_text() == signature):
+            if logger:
+                logger.info("Found existing %s", out.name)
+            return out
+        if logger:
+            logger.info("%s does not match %s, re-exporting", out.name, pt_path.name)
+
+    if logger:
+        logger.info("Exporting %s → %s (format=%s)", pt_path.name, out.name, fmt)
+    
+    model = YOLO(str(pt_path))
+    exported = Path(model.export(**kwargs))
+    
+    if not exported.exists():
+        error_msg = f"Failed to export to {out}"
+        if logger:
+            logger.error(error_msg)
+        raise RuntimeError(error_msg)
+    # Ultralytics always writes <stem>.<fmt>; move it to the precision-tagged name
+    if out.is_dir():
+        shutil.rmtree(out)
+    exported.replace(out)
+    if signature is None:
+        signature = export_signature(pt_path, kwargs)
+    sig_file.write_text(signature)
+    
+    if logger:
+        logger.info("Exported to %s", out.name)
+    return out
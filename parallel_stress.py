@@ -7,107 +7,297 @@ monitors overall CPU%, Memory%, and average FPS, and
 reports the max sustainable count.
 """
 
+import atexit
+import signal
 import subprocess
 import time
+import numpy as np
 import psutil
-import argparse
 import csv
 import os
 import sys
 import logging
+import math
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from logger_setup import setup_logger
+from _args import RAMP, build_parser
+from logger_setup import LazyJoin, setup_logger
+from utils import PYTHON_EXE, ensure_dir, ensure_test_video, memory_percent
 
 def parse_args():
-    p = argparse.ArgumentParser(
-        description="Find max parallel YOLO instances before CPU, RAM or FPS limits hit"
+    p = build_parser(
+        "Find max parallel YOLO instances before CPU, RAM or FPS limits hit",
+        RAMP
     )
-    p.add_argument("--log-level", type=str, default="INFO",
-                   choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
-                   help="Logging level (default: INFO)")
     p.add_argument("--test-script", "-t", default="stress_test_yolo_track.py",
                    help="Path to your YOLO stress-test script")
-    p.add_argument("--source", "-s", default="test_video.mp4",
-                   help="YOLO source (video file, image glob or camera index)")
     p.add_argument("--model", "-m", default="yolo11x.pt",
                    help="YOLO model checkpoint")
     p.add_argument("--duration", "-d", type=int, default=200,
                    help="Seconds to run each batch (default: 200s)")
-    p.add_argument("--interval", "-i", type=int, default=10,
-                   help="Sampling interval in seconds (default: 10s)")
-    p.add_argument("--max-instances", "-n", type=int, default=16,
-                   help="Maximum parallel instances to try (default: 16)")
-    p.add_argument("--cpu-threshold",   type=float, default=90.0,
-                   help="Avg CPU%% threshold (default: 90.0)")
-    p.add_argument("--mem-threshold",   type=float, default=90.0,
-                   help="Avg Memory%% threshold (default: 90.0)")
-    p.add_argument("--fps-threshold",   type=float, default=3.0,
-                   help="Avg FPS threshold (default: 3.0)")
+    p.add_argument("--ready-timeout",   type=int, default=120,
+                   help="Seconds a new instance may take to log its first "
+                        "sample (default: 120s)")
     return p.parse_args()
 
-def launch_instances(n, args, logger):
+def launch_instances(n, args, logger, procs):
+    """
+    Top `procs` up to `n` running instances.
+
+    Instances already running from the previous batch are kept, so each
+    step of the ramp only pays the start-up cost of the newly added ones.
+    Each instance runs until terminated and logs to its own cumulative CSV.
+    """
     # Create output directory if it doesn't exist
     output_dir = Path("output")
-    output_dir.mkdir(exist_ok=True)
+    ensure_dir("output")
     
-    logger.info(f"Launching {n} parallel instances")
+    logger.info("Launching %d more instance(s), %d in total", n - len(procs), n)
     
-    procs = []
-    for i in range(n):
-        logfile = output_dir / f"batch_{n}_{i}.csv"
-        
-        # Use virtual environment python if available
-        venv_root = os.environ.get("VIRTUAL_ENV")
-        if venv_root:
-            if sys.platform == "win32":
-                # Windows path
-                python = os.path.join(venv_root, "Scripts", "python.exe")
-            else:
-                # Unix-like path (Linux/macOS)
-                python = os.path.join(venv_root, "bin", "python")
-        else:
-            python = sys.executable
-            
-        # Build command with log level passed to child processes
-        cmd = [
-            python, args.test_script,
-            "--source", args.source,
-            "--model", args.model,
-            "--duration", str(args.duration),
-            "--log-file", str(logfile),  # Convert Path to string
-            "--log-interval", str(args.interval),
-            "--log-level", args.log_level
-        ]
+    # Command shared by every instance, with log level passed to child processes
+    base_cmd = (
+        PYTHON_EXE, args.test_script,
+        "--source", args.source,
+        "--model", args.model,
+        "--duration", "0",  # run until terminated
+        "--watch-parent",   # ...or until this process is gone
+        "--log-interval", str(args.interval),
+        "--log-level", args.log_level
+    )
+    
+    for i in range(len(procs), n):
+        logfile = output_dir / f"batch_cumulative_{i}.csv"
+        # A log left by a previous run would look like an instance that is ready
+        logfile.unlink(missing_ok=True)
+        cmd = (*base_cmd, "--log-file", str(logfile))
         
-        logger.debug(f"Starting instance {i+1}/{n} with command: {' '.join(cmd)}")
-        p = subprocess.Popen(cmd)
-        procs.append((p, Path(logfile)))
+        logger.debug("Starting instance %d/%d with command: %s", i+1, n, LazyJoin(cmd))
+        # close_fds=False skips the fd-closing walk (Python's own fds are
+        # non-inheritable anyway) and stdout goes to the instance's log file
+        # only. All instances share one process group, led by the first one,
+        # so they can be signalled together.
+        p = subprocess.Popen(cmd, close_fds=False,
+                             stdin=subprocess.DEVNULL,
+                             stdout=subprocess.DEVNULL,
+                             process_group=procs[0][0].pid if procs else 0)
+        procs.append((p, logfile))
         
     return procs
 
-def monitor_system(duration, interval):
-    cpu_samples, mem_samples = [], []
-    start = time.time()
-    while time.time() - start < duration:
-        cpu_samples.append(psutil.cpu_percent(interval=None))
-        mem_samples.append(psutil.virtual_memory().percent)
-        time.sleep(interval)
-    return (sum(cpu_samples) / len(cpu_samples),
-            sum(mem_samples) / len(mem_samples))
-
-def parse_fps_from_csv(logfile: Path):
-    """Read the last 'avg_fps' value from a CSV log file."""
-    last_fps = None
+def wait_until_ready(procs, logger, timeout):
+    """
+    Wait until every instance has logged its first metrics sample.
+
+    Returns None once all are ready. Otherwise returns why not, as soon as
+    an instance exits or once `timeout` seconds have passed.
+    """
+    start = time.monotonic()
+    pending = list(procs)
+    while True:
+        waiting = []
+        for p, logfile in pending:
+            if read_last_sample(logfile) is not None:
+                logger.debug("%s ready after %.1fs", logfile.name, time.monotonic() - start)
+            elif p.poll() is not None:
+                return (f"Instance logging to {logfile} exited with code "
+                        f"{p.returncode} before it was ready")
+            else:
+                waiting.append((p, logfile))
+        pending = waiting
+        if not pending:
+            return None
+        if time.monotonic() - start > timeout:
+            return f"{len(pending)} instance(s) not ready after {timeout}s"
+        time.sleep(0.25)
+
+def terminate_instances(procs, logger, timeout=5):
+    """
+    Terminate all running stress-test instances and their descendants.
+
+    The whole process group gets one SIGTERM; anything still running after
+    `timeout` seconds gets one SIGKILL. Returns how many had to be killed.
+    """
+    if not procs:
+        return 0
+    logger.debug("Terminating child processes")
+    # Snapshot the tree first: once an instance exits its children get
+    # reparented and can no longer be found through it
+    tree = []
+    for p, _ in procs:
+        try:
+            proc = psutil.Process(p.pid)
+            tree += [proc, *proc.children(recursive=True)]
+        except psutil.NoSuchProcess:
+            pass
+
+    def on_exit(proc):
+        logger.debug("Process %d exited with %s", proc.pid, proc.returncode)
+
+    pgid = procs[0][0].pid
+    has_killpg = hasattr(os, "killpg")
+
+    def in_group(proc):
+        try:
+            return os.getpgid(proc.pid) == pgid
+        except ProcessLookupError:
+            return True  # already gone, nothing to signal
+
+    def signal_tree(targets, sig):
+        # One killpg reaches every instance; only descendants that left
+        # the group (or every process, without killpg) are signalled singly
+        if has_killpg:
+            try:
+                os.killpg(pgid, sig)
+            except ProcessLookupError:
+                pass
+            targets = [proc for proc in targets if not in_group(proc)]
+        for proc in targets:
+            try:
+                proc.send_signal(sig)
+            except psutil.NoSuchProcess:
+                pass
+
+    signal_tree(tree, signal.SIGTERM)
+    _, alive = psutil.wait_procs(tree, timeout=timeout, callback=on_exit)
+    if alive:
+        logger.debug("Killing %d process(es) that ignored SIGTERM", len(alive))
+        # Windows has no SIGKILL; psutil's SIGTERM there is TerminateProcess
+        signal_tree(alive, getattr(signal, "SIGKILL", signal.SIGTERM))
+        psutil.wait_procs(alive, timeout=timeout, callback=on_exit)
+    # psutil reaped the instances; let the Popen objects notice
+    for p, _ in procs:
+        p.poll()
+    procs.clear()
+    return len(alive)
+
+def warm_page_cache(model_path, logger):
+    """
+    Pull the model file(s) into the OS page cache once, so every instance
+    reads the weights from memory instead of each going to disk.
+    """
+    path = Path(model_path)
+    if path.is_dir():
+        # OpenVINO IR and similar formats are directories of files
+        files = [f for f in path.rglob("*") if f.is_file()]
+    elif path.is_file():
+        files = [path]
+    else:
+        return
+    for f in files:
+        try:
+            with open(f, "rb") as fh:
+                if hasattr(os, "posix_fadvise"):
+                    # Kernel readahead, no copy into this process
+                    os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                else:
+                    while fh.read(1 << 20):
+                        pass
+        except OSError as e:
+            logger.debug("Could not pre-load %s: %s", f, e)
+
+def monitor_system(duration, interval, procs=()):
+    """
+    Return (avg CPU%, avg Memory%) over the next `duration` seconds.
+
+    Each CPU% sample is a blocking psutil.cpu_percent(interval) call, so the
+    samples cover the window back to back without any sleep bookkeeping.
+    Memory% moves slowly and is only read on every other sample.
+    Monitoring stops early once any instance in `procs` has exited, since
+    the batch has failed at that point.
+    """
+    # Round up so the whole duration is covered; the last sample only
+    # takes whatever is left of it
+    n_samples = max(1, math.ceil(duration / interval))
+    cpu_samples = np.empty(n_samples, dtype=np.float32)
+    mem_samples = np.empty((n_samples + 1) // 2, dtype=np.float32)
+    count = 0
+    while count < n_samples:
+        remaining = duration - count * interval
+        cpu_samples[count] = psutil.cpu_percent(
+            interval=remaining if 0 < remaining < interval else interval
+        )
+        if count % 2 == 0:
+            mem_samples[count // 2] = memory_percent()
+        count += 1
+        if any(p.poll() is not None for p, _ in procs):
+            break
+    return (float(cpu_samples[:count].mean()),
+            float(mem_samples[:(count + 1) // 2].mean()))
+
+# Chunk size used to read a CSV log backwards from its end
+TAIL_BYTES = 4096
+# Column indices of (timestamp, avg_fps, frames), keyed by log file path
+_column_cache = {}
+
+def _column_indices(f, logfile: Path):
+    """Look up the sample column positions from the CSV header, once per file."""
+    key = str(logfile)
+    indices = _column_cache.get(key)
+    if indices is None:
+        header = next(csv.reader([f.readline().decode("utf-8", "ignore")]), [])
+        indices = (header.index("timestamp"),
+                   header.index("avg_fps"),
+                   header.index("frames"))
+        _column_cache[key] = indices
+    return indices
+
+def read_last_sample(logfile: Path):
+    """
+    Read (timestamp, avg_fps, frames) from the last row of a CSV log file.
+
+    Only the tail of the file is read, so the cost does not grow with the
+    number of rows logged.
+    """
     try:
-        with logfile.open() as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                last_fps = float(row["avg_fps"])
+        with logfile.open("rb") as f:
+            ts_idx, fps_idx, frames_idx = _column_indices(f, logfile)
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            tail = b""
+            # Walk back until the buffer holds at least one whole row
+            while pos > 0 and tail.count(b"\n") < 2:
+                size = min(pos, TAIL_BYTES)
+                pos -= size
+                f.seek(pos)
+                tail = f.read(size) + tail
     except Exception:
-        pass
-    return last_fps
+        return None
+
+    lines = tail.decode("utf-8", "ignore").splitlines()
+    if not tail.endswith(b"\n"):
+        # The last row is still being written
+        lines = lines[:-1]
+    for line in reversed(lines):
+        fields = next(csv.reader([line]), [])
+        try:
+            return (float(fields[ts_idx]),
+                    float(fields[fps_idx]),
+                    int(fields[frames_idx]))
+        except (IndexError, ValueError):
+            # Blank line, the header, or a row cut by the seek
+            continue
+    return None
+
+def parse_fps_from_csv(logfile: Path, mark):
+    """
+    Return the FPS an instance achieved since `mark`, the sample returned
+    by read_last_sample() at the start of the window.
+
+    Returns None if either sample can't be read. A missing mark is a
+    failure too: the instance's own average FPS would include warm-up.
+    """
+    if mark is None:
+        return None
+    sample = read_last_sample(logfile)
+    if sample is None:
+        return None
+    elapsed = sample[0] - mark[0]
+    if elapsed <= 0:
+        # Nothing logged during the window
+        return 0.0
+    return (sample[2] - mark[2]) / elapsed
 
 def main():
     args = parse_args()
@@ -120,70 +310,96 @@ def main():
     log_file = Path("output") / f"parallel_stress_{run_id}.log"
     logger = setup_logger(__name__, log_file, level=log_level)
     
-    logger.info(f"Starting parallel stress test (Run ID: {run_id})")
-    logger.info(f"Arguments: {vars(args)}")
+    logger.info("Starting parallel stress test (Run ID: %s)", run_id)
+    logger.info("Arguments: %s", vars(args))
     
+    # Fetch the default test video once, up front, so a first-run download
+    # doesn't count against the first instance's --ready-timeout
+    if args.source == "test_video.mp4":
+        args.source = ensure_test_video(args.source)
+    warm_page_cache(args.model, logger)
+
     sustainable = 0
+    procs = []
+    # Instances live in their own process group, away from the terminal's
+    # Ctrl-C, so make sure they are torn down however this process exits.
+    # SIGTERM becomes SystemExit so the atexit hook runs for it too; after
+    # a SIGKILL the instances notice they were orphaned and stop themselves.
+    atexit.register(terminate_instances, procs, logger)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
 
     for n in range(1, args.max_instances + 1):
-        logger.info(f"Testing {n} parallel instances...")
+        logger.info("Testing %d parallel instances...", n)
         
         # Launch
-        procs = launch_instances(n, args, logger)
-        logger.debug("Waiting 10 seconds for processes to start")
-        time.sleep(10)  # let them spin up
+        launch_instances(n, args, logger, procs)
+        logger.debug("Waiting for new instances to log their first sample")
+        failure = wait_until_ready(procs, logger, args.ready_timeout)
+        if failure is not None:
+            logger.info("❌ Unsustainable at N=%d", n)
+            logger.info("Reason: %s", failure)
+            break
+
+        # Remember where each log stands so only this window is measured
+        marks = [read_last_sample(logfile) for _, logfile in procs]
 
         # Monitor CPU & Memory
-        logger.debug(f"Monitoring system resources for {args.duration} seconds")
-        avg_cpu, avg_mem = monitor_system(args.duration, args.interval)
-        logger.info(f"Avg CPU%: {avg_cpu:.1f}, Avg Mem%: {avg_mem:.1f}")
-
-        # Terminate all
-        logger.debug("Terminating child processes")
-        alive = 0
-        for p, _ in procs:
-            if p.poll() is None:
-                alive += 1
-            else:
-                # exited on its own → inspect p.returncode
-                if p.returncode == 0:
-                    alive += 1
-            p.terminate()
-        logger.info(f"Processes alive at end: {alive}/{n}")
+        logger.debug("Monitoring system resources for %d seconds", args.duration)
+        avg_cpu, avg_mem = monitor_system(args.duration, args.interval, procs)
+        logger.info("Avg CPU%%: %.1f, Avg Mem%%: %.1f", avg_cpu, avg_mem)
+
+        # Instances run until terminated, so any that exited have failed
+        alive = sum(1 for p, _ in procs if p.poll() is None)
+        logger.info("Processes alive at end: %d/%d", alive, n)
 
-        # Parse FPS logs
+        # Parse FPS logs concurrently, the reads are pure I/O
         logger.debug("Parsing FPS from CSV logs")
-        fps_vals = []
-        for _, logfile in procs:
-            fps = parse_fps_from_csv(logfile)
-            if fps is not None:
-                fps_vals.append(fps)
-            else:
-                logger.warning(f"Could not parse FPS from {logfile}")
-                
-        avg_fps = (sum(fps_vals) / len(fps_vals)) if fps_vals else 0.0
-        logger.info(f"Avg FPS across instances: {avg_fps:.1f}")
+        logfiles = [logfile for _, logfile in procs]
+        with ThreadPoolExecutor(max_workers=min(n, 8)) as ex:
+            fps_results = list(ex.map(parse_fps_from_csv, logfiles, marks))
+        for logfile, mark, fps in zip(logfiles, marks, fps_results):
+            if fps is None:
+                logger.warning("Could not parse FPS from %s%s", logfile,
+                               "" if mark else " (no sample at window start)")
+        fps_vals = np.fromiter((fps for fps in fps_results if fps is not None),
+                               dtype=np.float32)
+
+        if fps_vals.size:
+            avg_fps = float(fps_vals.mean())
+            std_fps = float(fps_vals.std())
+            p5_fps, p95_fps = (float(v) for v in np.percentile(fps_vals, [5, 95]))
+        else:
+            avg_fps = std_fps = p5_fps = p95_fps = 0.0
+        logger.info("FPS across instances: avg %.1f, std %.1f, p5 %.1f, p95 %.1f",
+                    avg_fps, std_fps, p5_fps, p95_fps)
 
         # Check thresholds
         if (alive < n or
             avg_cpu > args.cpu_threshold or
             avg_mem > args.mem_threshold or
-            avg_fps < args.fps_threshold):
-            logger.info(f"❌ Unsustainable at N={n}")
+            p5_fps < args.fps_threshold):
+            logger.info("❌ Unsustainable at N=%d", n)
             if alive < n:
-                logger.info(f"Reason: Only {alive}/{n} processes stayed alive")
+                logger.info("Reason: Only %d/%d processes stayed alive", alive, n)
             if avg_cpu > args.cpu_threshold:
-                logger.info(f"Reason: CPU usage ({avg_cpu:.1f}%) exceeded threshold ({args.cpu_threshold:.1f}%)")
+                logger.info("Reason: CPU usage (%.1f%%) exceeded threshold (%.1f%%)",
+                            avg_cpu, args.cpu_threshold)
             if avg_mem > args.mem_threshold:
-                logger.info(f"Reason: Memory usage ({avg_mem:.1f}%) exceeded threshold ({args.mem_threshold:.1f}%)")
-            if avg_fps < args.fps_threshold:
-                logger.info(f"Reason: FPS ({avg_fps:.1f}) below threshold ({args.fps_threshold:.1f})")
+                logger.info("Reason: Memory usage (%.1f%%) exceeded threshold (%.1f%%)",
+                            avg_mem, args.mem_threshold)
+            if p5_fps < args.fps_threshold:
+                logger.info("Reason: 5th percentile FPS (%.1f) below threshold (%.1f)",
+                            p5_fps, args.fps_threshold)
             break
         else:
-            logger.info(f"✓ Sustainable at N={n}")
+            # Leave the instances running for the next batch
+            logger.info("✓ Sustainable at N=%d", n)
             sustainable = n
 
-    logger.info(f"Max sustainable parallel instances ≈ {sustainable}")
+    # Terminate all
+    terminate_instances(procs, logger)
+
+    logger.info("Max sustainable parallel instances ≈ %d", sustainable)
     logger.info("Parallel stress test complete")
 
 if __name__ == "__main__":
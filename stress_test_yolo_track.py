@@ -5,40 +5,51 @@ Continuously runs Ultraly­tics YOLO tracking on a video (or camera)
 and logs system stats to a CSV for later analysis.
 """
 
+import atexit
+import os
+import signal
+import sys
 import time
+import shutil
 import subprocess
+import threading
 import csv
-import argparse
 import logging
 from pathlib import Path
 import uuid
 
-from utils import ensure_test_video
+from utils import ensure_dir, ensure_test_video, memory_percent
+from _args import build_parser
 from logger_setup import setup_logger
+from export import export_model, has_nvidia_gpu, is_intel_gpu
 
 import psutil
 from ultralytics import YOLO
 
-def parse_args():
-    parser = argparse.ArgumentParser(
-        description="YOLO Tracking Stress Test with System Metrics Logging"
+# One metrics row: timestamp, avg_fps, cpu_pct, mem_pct, gpu_pct, gpu_temp, frames
+ROW_FMT = "{:.3f},{:.2f},{},{},{},{},{}\n"
+
+def parse_args(argv=None):
+    parser = build_parser(
+        "YOLO Tracking Stress Test with System Metrics Logging"
     )
     parser.add_argument(
-        "--log-level", type=str, default="INFO",
-        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
-        help="Logging level (default: INFO)"
+        "--model", "-m", type=str, default="yolo11x.pt",
+        help="YOLO model checkpoint path"
     )
     parser.add_argument(
-        "--source", "-s", type=str, default="test_video.mp4",
-        help="Input source (video file, image glob or camera index)"
+        "--precision", type=str, default=None,
+        choices=["fp32", "fp16", "int8"],
+        help="Export a .pt checkpoint to TensorRT/OpenVINO at this precision "
+             "before loading it (default: load the model as given)"
     )
     parser.add_argument(
-        "--model", "-m", type=str, default="yolo11x.pt",
-        help="YOLO model checkpoint path"
+        "--duration", "-d", type=int, default=200,
+        help="Test duration in seconds, 0 to run until terminated (default: 200)"
     )
     parser.add_argument(
-        "--duration", "-d", type=int, default=200,
-        help="Test duration in seconds (default: 200)"
+        "--watch-parent", action="store_true",
+        help="Stop when the launching process exits (used by parallel_stress)"
     )
     parser.add_argument(
         "--log-interval", "-i", type=int, default=10,
@@ -48,29 +59,109 @@ def parse_args():
         "--log-file", "-o", type=str, default="output/stress_stats.csv",
         help="Output CSV file for logging (default: output/stress_stats.csv)"
     )
-    return parser.parse_args()
+    return parser.parse_args(argv)
+
+def resolve_model(model_path, precision, logger):
+    """
+    Return the model path to load for the requested `precision`.
+
+    A .pt checkpoint is exported (or its cached export reused) for the GPU
+    that is present, as main.py does; anything else is returned unchanged.
+    """
+    pt_path = Path(model_path)
+    if precision is None or pt_path.suffix != ".pt":
+        return model_path
+
+    kwargs = {"half": precision == "fp16", "int8": precision == "int8"}
+    if has_nvidia_gpu():
+        return str(export_model(pt_path, fmt="engine", device="0", logger=logger, **kwargs))
+    if is_intel_gpu():
+        return str(export_model(pt_path, fmt="openvino", logger=logger, **kwargs))
+    logger.warning(f"No supported GPU detected, ignoring --precision {precision}")
+    return model_path
 
 def init_csv(log_file):
+    """
+    Create the metrics CSV with its header row and keep it open.
+
+    Returns the file, line-buffered so every row is on disk as soon as it
+    is written. Rows are written with ROW_FMT rather than csv.writer: the
+    schema is fixed and no field can contain a comma.
+    """
     # Ensure the output directory exists
-    log_path = Path(log_file)
-    log_path.parent.mkdir(exist_ok=True)
+    ensure_dir(str(Path(log_file).parent))
     
     # Write header
-    with open(log_file, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "timestamp",
-            "avg_fps",
-            "cpu_pct",
-            "mem_pct",
-            "gpu_pct",
-            "gpu_temp"
-        ])
+    f = open(log_file, "w", newline="", buffering=1)
+    csv.writer(f).writerow([
+        "timestamp",
+        "avg_fps",
+        "cpu_pct",
+        "mem_pct",
+        "gpu_pct",
+        "gpu_temp",
+        "frames"
+    ])
+    return f
 
+def track_frames(model, source):
+    """
+    Yield tracking results from `source`, restarting it whenever it ends
+    so that long-running instances keep producing frames.
+    """
+    while True:
+        produced = False
+        for result in model.track(
+            source=source,
+            stream=True,
+            persist=True,
+            show=False,
+            save=False,
+            tracker='botsort.yaml',
+            verbose=False,
+        ):
+            produced = True
+            yield result
+        if not produced:
+            return
 
-def main():
-    args = parse_args()
-    
+def start_gpu_monitor():
+    """
+    Start one long-lived nvidia-smi that reports GPU utilization and
+    temperature every second, instead of launching it for every sample.
+
+    Returns (process, stats) where stats[0] always holds the latest
+    (gpu_pct, gpu_temp) reading, or (None, stats) without nvidia-smi.
+    """
+    stats = [("N/A", "N/A")]
+    if shutil.which("nvidia-smi") is None:
+        return None, stats
+
+    proc = subprocess.Popen(
+        ["nvidia-smi",
+         "--query-gpu=utilization.gpu,temperature.gpu",
+         "--format=csv,noheader,nounits",
+         "-lms", "1000"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        bufsize=1
+    )
+    atexit.register(proc.terminate)
+
+    def read_stats():
+        for line in proc.stdout:
+            # Split on the bare comma so no field can carry one into a row
+            fields = [field.strip() for field in line.split(",")]
+            if len(fields) == 2:
+                stats[0] = tuple(fields)
+
+    threading.Thread(target=read_stats, daemon=True).start()
+    return proc, stats
+
+
+def run(args):
+    """Run the tracking stress test described by parsed `args`."""
     # Generate a unique run ID
     run_id = str(uuid.uuid4())[:8]
     
@@ -93,76 +184,92 @@ def main():
 
     # Initialize CSV for metrics
     logger.debug(f"Initializing CSV metrics file: {args.log_file}")
-    init_csv(args.log_file)
+    csv_file = init_csv(args.log_file)
 
     # Load YOLO model once
+    args.model = resolve_model(args.model, args.precision, logger)
     logger.info(f"Loading YOLO model: {args.model}")
     model = YOLO(args.model, task="detect")
 
     logger.info(f"Starting stress test for {args.duration}s "
                 f"on source '{args.source}' with model '{args.model}'")
-    start_time = time.time()
+    gpu_proc, gpu_stats = start_gpu_monitor()
+    if gpu_proc is None:
+        logger.debug("nvidia-smi not found, GPU stats will be N/A")
+
+    # The tracking loop only publishes its frame count, with no clock read;
+    # a sampler thread does everything else once per second so the loop
+    # never stalls on stats or I/O.
+    published = [0]
+    stop = threading.Event()
+    start_wall = time.time()
+    start_ns = time.monotonic_ns()
+    parent_pid = os.getppid() if args.watch_parent else None
+
+    def sample_stats():
+        next_log = args.log_interval
+        while True:
+            # Stop when the loop is done, the duration is reached or the
+            # launching process is gone (we got reparented)
+            done = stop.wait(1.0)
+            # Reading the count first keeps the clock at or after its last
+            # frame, so the FPS is accurate to within one frame
+            frames = published[0]
+            elapsed = (time.monotonic_ns() - start_ns) / 1e9
+            done = done or bool(args.duration and elapsed >= args.duration) or (
+                parent_pid is not None and os.getppid() != parent_pid
+            )
+            if frames:
+                current_fps = frames / elapsed
+
+                # Collect system stats
+                cpu = psutil.cpu_percent(interval=None)
+                mem = memory_percent()
+
+                # Latest NVIDIA GPU stats, if available
+                gpu_pct, gpu_temp = gpu_stats[0]
+
+                if elapsed >= next_log or done:
+                    next_log += args.log_interval
+                    logger.info(f"[{elapsed:.1f}s] Stats: FPS={current_fps:.1f}, CPU={cpu}%, MEM={mem}%, GPU={gpu_pct}%, GPU_temp={gpu_temp}°C")
+
+                # Write metrics to CSV
+                csv_file.write(ROW_FMT.format(
+                    start_wall + elapsed, current_fps,
+                    cpu, mem, gpu_pct, gpu_temp, frames
+                ))
+            if done:
+                stop.set()
+                return
+
+    sampler = threading.Thread(target=sample_stats, daemon=True)
+    sampler.start()
     frame_count = 0
 
-    # Run tracking loop
-    for result in model.track(
-        source=args.source,
-        stream=True,
-        persist=True,
-        show=False,
-        save=False,
-        tracker='botsort.yaml',
-        verbose=False,
-    ):
-        frame_count += 1
-
-        # Update FPS estimate and log system stats every 100 frames
-        if frame_count % 100 == 0:
-            elapsed = time.time() - start_time
-            current_fps = frame_count / elapsed
-            
-            # Collect system stats
-            cpu = psutil.cpu_percent(interval=None)
-            mem = psutil.virtual_memory().percent
-            
-            # Query NVIDIA GPU stats, if available
-            try:
-                gpu_query = subprocess.run(
-                    ["nvidia-smi",
-                     "--query-gpu=utilization.gpu,temperature.gpu",
-                     "--format=csv,noheader,nounits"],
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                gpu_pct, gpu_temp = gpu_query.stdout.strip().split(", ")
-                logger.debug(f"NVIDIA GPU stats: {gpu_pct}%, {gpu_temp}°C")
-            except Exception as e:
-                gpu_pct, gpu_temp = "N/A", "N/A"
-                logger.debug(f"No NVIDIA GPU stats available: {e}")
-                
-            # Log metrics
-            stats_msg = f"[{elapsed:.1f}s] Stats: FPS={current_fps:.1f}, CPU={cpu}%, MEM={mem}%, GPU={gpu_pct}%, GPU_temp={gpu_temp}°C"
-            logger.info(stats_msg)
-                
-            # Write metrics to CSV
-            with open(args.log_file, "a", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    round(time.time(), 3),
-                    round(current_fps, 2),
-                    cpu,
-                    mem,
-                    gpu_pct,
-                    gpu_temp
-                ])
-
-        # Stop after desired duration
-        if time.time() - start_time >= args.duration:
-            break
-
-    # Clean up
+    try:
+        # Run tracking loop
+        for result in track_frames(model, args.source):
+            frame_count += 1
+            published[0] = frame_count
+
+            # Set by the sampler once the duration is reached
+            if stop.is_set():
+                break
+    finally:
+        # One last sample covering the final frames, then shut down
+        stop.set()
+        sampler.join()
+        csv_file.close()
+        if gpu_proc is not None:
+            gpu_proc.terminate()
+
     logger.info(f"Stress test complete. Stats saved to: {args.log_file}")
 
+def main():
+    # parallel_stress stops instances with SIGTERM; exit through SystemExit
+    # so run()'s cleanup, the atexit hooks and logging shutdown still run
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    run(parse_args())
+
 if __name__ == "__main__":
     main()
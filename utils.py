@@ -2,19 +2,52 @@
 Utils module for EdgeTest with helper functions.
 """
 
+import hashlib
+import logging
+import os
+import re
+import sys
+from functools import lru_cache
 from pathlib import Path
-import gdown
 from logger_setup import setup_logger
 
-# Set up module logger
-logger = setup_logger(__name__, "output/edge_test_utils.log")
+@lru_cache(maxsize=1)
+def _logger():
+    """Module logger, set up on first use rather than at import."""
+    return setup_logger(__name__, "output/edge_test_utils.log")
 
-def ensure_test_video(video_path="test_video.mp4"):
+def _venv_python():
+    """Return the virtual environment's python if one is active."""
+    venv_root = os.environ.get("VIRTUAL_ENV")
+    if not venv_root:
+        return sys.executable
+    if sys.platform == "win32":
+        # Windows path
+        return os.path.join(venv_root, "Scripts", "python.exe")
+    # Unix-like path (Linux/macOS)
+    return os.path.join(venv_root, "bin", "python")
+
+# Interpreter used to launch the child scripts, resolved once
+PYTHON_EXE = _venv_python()
+
+@lru_cache(maxsize=None)
+def ensure_dir(path):
+    """Create directory `path` if needed, at most once per process."""
+    Path(path).mkdir(exist_ok=True)
+
+# Google Drive file ID of the sample test video
+TEST_VIDEO_ID = "15Zjw5MAceckgasf3iYeEifcoPe8jcdRB"
+
+def ensure_test_video(video_path="test_video.mp4", sha256=None):
     """
     Ensures the test video exists, downloading it if necessary.
     
+    The download goes to a temporary file that is only moved into place
+    once complete (and, if `sha256` is given, once its digest matches).
+    
     Args:
         video_path: Local path where the video should be stored
+        sha256: Expected hex digest of the video, checked if given
         
     Returns:
         Path to the video file
@@ -22,25 +55,76 @@ def ensure_test_video(video_path="test_video.mp4"):
     video_file = Path(video_path)
     
     if not video_file.exists():
-        logger.info(f"Test video not found at {video_path}, downloading from Google Drive...")
-        
-        # Google Drive file ID from the link
-        file_id = "15Zjw5MAceckgasf3iYeEifcoPe8jcdRB"
+        # Only needed on this rare path, so don't import it for every instance
+        import gdown
+
+        _logger().info(f"Test video not found at {video_path}, downloading from Google Drive...")
+        _logger().debug(f"Using file ID: {TEST_VIDEO_ID}")
         
-        # Use gdown to download from Google Drive
-        logger.debug(f"Using file ID: {file_id}")
+        tmp_file = video_file.with_name(video_file.name + ".part")
         gdown.download(
-            f"https://drive.google.com/uc?id={file_id}", 
-            output=str(video_file), 
+            f"https://drive.google.com/uc?id={TEST_VIDEO_ID}",
+            output=str(tmp_file),
             quiet=False
         )
         
-        if not video_file.exists():
-            logger.error(f"Failed to download test video to {video_path}")
+        if not tmp_file.exists():
+            _logger().error(f"Failed to download test video to {video_path}")
             raise RuntimeError(f"Failed to download test video to {video_path}")
-            
-        logger.info(f"Download complete: {video_path}")
+        
+        if sha256 is not None:
+            with open(tmp_file, "rb") as f:
+                digest = hashlib.file_digest(f, "sha256").hexdigest()
+            if digest != sha256.lower():
+                tmp_file.unlink(missing_ok=True)
+                _logger().error(f"Checksum mismatch for {video_path}: got {digest}")
+                raise RuntimeError(f"Checksum mismatch for downloaded test video {video_path}")
+        
+        os.replace(tmp_file, video_file)
+        _logger().info(f"Download complete: {video_path}")
     else:
-        logger.debug(f"Test video already exists at {video_path}")
+        # Common path for every instance: don't open the log file just for this
+        logging.getLogger(__name__).debug(f"Test video already exists at {video_path}")
     
     return str(video_file)
+
+_MEM_TOTAL_RE = re.compile(rb"MemTotal:\s+(\d+)")
+_MEM_AVAILABLE_RE = re.compile(rb"MemAvailable:\s+(\d+)")
+# Open /proc/meminfo handle and MemTotal (kB), set up on first use;
+# _meminfo is False where /proc/meminfo can't be used
+_meminfo = None
+_mem_total_kb = None
+
+def memory_percent():
+    """
+    System memory usage in percent, as psutil.virtual_memory().percent.
+    
+    On Linux /proc/meminfo is kept open and only MemAvailable is re-read
+    per call, against a cached MemTotal; elsewhere this uses psutil.
+    
+    Returns:
+        Used memory in percent, rounded to one decimal
+    """
+    global _meminfo, _mem_total_kb
+    if _meminfo is None:
+        _meminfo = False
+        try:
+            f = open("/proc/meminfo", "rb", buffering=0)
+        except OSError:
+            pass
+        else:
+            match = _MEM_TOTAL_RE.search(f.read(4096))
+            if match:
+                _meminfo, _mem_total_kb = f, int(match.group(1))
+            else:
+                f.close()
+    
+    if _meminfo:
+        _meminfo.seek(0)
+        # MemAvailable is the third line, well within the first 256 bytes
+        match = _MEM_AVAILABLE_RE.search(_meminfo.read(256))
+        if match:
+            return round(100.0 * (1 - int(match.group(1)) / _mem_total_kb), 1)
+    
+    import psutil
+    return psutil.virtual_memory().percent